@@ -1,6 +1,11 @@
 import json
 import os
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib json module works as fallback
+    orjson = None
+
 
 class Feature:
     """
@@ -61,6 +66,10 @@ class FeatureCollection:
         """adds feature to collection"""
         self.__structure["features"].append(feature)
 
+    def extend_features(self, features) -> None:
+        """adds all features from an iterable to the collection in one go"""
+        self.__structure["features"].extend(features)
+
     def save_geojson(self, path) -> None:
         """
         func for saving geojson to disk
@@ -68,7 +77,10 @@ class FeatureCollection:
         :return: none
         """
         try:
-            geo_json = json.dumps(self._get_features(), indent=4)
+            if orjson is not None:
+                geo_json = orjson.dumps(self._get_features(), option=orjson.OPT_INDENT_2).decode()
+            else:
+                geo_json = json.dumps(self._get_features(), indent=4)
             os.makedirs(os.path.dirname(path), exist_ok=True)
             with open(path, "w") as of:
                 of.write(geo_json)
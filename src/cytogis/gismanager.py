@@ -1,8 +1,68 @@
+import csv
 import json
+import mmap
+import os
+from collections import defaultdict
+from math import isnan
+from typing import Iterator
+
+import numpy as np
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib json module works as fallback
+    orjson = None
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional, the numpy kernel below works as fallback
+    njit = None
+
 from .features import Feature, FeatureCollection
 
+# below this file size, plain csv parsing beats pandas' fixed setup cost
+_SMALL_CSV_BYTES = 1 << 20
+
+
+if njit is not None:
+    @njit(cache=True, parallel=True)
+    def _gather_edge_coords(src_idx: np.ndarray, tgt_idx: np.ndarray, coords: np.ndarray) -> tuple:
+        """
+        kernel: gathers source/target coordinates for every edge whose endpoints both
+        resolved to a location id (-1 marks an unknown location). edges are
+        independent, so the loop runs across all cores via prange.
+        :return: tuple of (src_coords, tgt_coords, valid mask), full edge length
+        """
+        n = src_idx.shape[0]
+        valid = np.empty(n, dtype=np.bool_)
+        src_coords = np.zeros((n, 2), dtype=np.float64)
+        tgt_coords = np.zeros((n, 2), dtype=np.float64)
+        for i in prange(n):
+            s = src_idx[i]
+            t = tgt_idx[i]
+            ok = s >= 0 and t >= 0
+            valid[i] = ok
+            if ok:
+                src_coords[i, 0] = coords[s, 0]
+                src_coords[i, 1] = coords[s, 1]
+                tgt_coords[i, 0] = coords[t, 0]
+                tgt_coords[i, 1] = coords[t, 1]
+        return src_coords, tgt_coords, valid
+else:
+    def _gather_edge_coords(src_idx: np.ndarray, tgt_idx: np.ndarray, coords: np.ndarray) -> tuple:
+        """
+        kernel: gathers source/target coordinates for every edge whose endpoints both
+        resolved to a location id (-1 marks an unknown location).
+        :return: tuple of (src_coords, tgt_coords, valid mask), full edge length
+        """
+        valid = (src_idx >= 0) & (tgt_idx >= 0)
+        src_coords = np.zeros((src_idx.shape[0], 2), dtype=np.float64)
+        tgt_coords = np.zeros_like(src_coords)
+        src_coords[valid] = coords[src_idx[valid]]
+        tgt_coords[valid] = coords[tgt_idx[valid]]
+        return src_coords, tgt_coords, valid
+
 
 class GISManager:
     """
@@ -15,43 +75,95 @@ class GISManager:
     * coord_path - specifies path to a csv containing lat and long for the places: str
     * lat_long_cols - specifies the names of the columns containing lat and long coordinates: tuple
     optional:
-    * cols_to_drop - specifies which cols from the csv containing the coordinates should be dropped: list
+    * cols_to_drop - deprecated: only the Ort and coordinate columns are read from the csv anyway
 
     """
 
     def __init__(self, config) -> None:
         self.config = config
+        self._cyto_data = None
         self.list_of_nodes, self.list_of_edges = self._get_nodes_edges()
-        self.coordinates_data = self._map_locations()
-        self.unique_locations = self._get_location_set(self.coordinates_data)
+        self.coordinates_data = None
+        self.locations_map = self._load_locations()
+        # integer id per location plus an (N, 2) coordinate array for cheap edge lookups
+        self._loc_ids = {ort: idx for idx, ort in enumerate(self.locations_map)}
+        self._coords_arr = np.array(list(self.locations_map.values()), dtype=float).reshape(-1, 2)
+        # memoized FeatureCollections, keyed by kwargs for the edge variant
+        self._edges_collections = {}
+        self._nodes_collection = None
 
     def _read_data_cyto(self) -> dict:
         """
-        func to read cytoscape json files
+        func to read cytoscape json files. the file is memory-mapped so the parser
+        reads straight from the page cache instead of a full read() copy, and the
+        parsed result is cached on the instance so repeated calls do not reparse it.
+        prompts for a new path on bad input instead of recursing.
         :return: dict
         """
-        try:
-            with open(self.config["cyto_path"], 'r') as f:
-                data = json.load(f)
-            return data
-        except FileNotFoundError:
-            self.config['cyto_path'] = input(
-                f"File not found: {self.config['cyto_path']}, please provide a valid path to file:")
-            return self._read_data_cyto()
-        except OSError:
-            self.config['cyto_path'] = input(
-                f"Corrupted path: {self.config['cyto_path']}.  does the path you provided contain ' or \"? ")
-            return self._read_data_cyto()
+        if self._cyto_data is not None:
+            return self._cyto_data
+        while True:
+            try:
+                with open(self.config["cyto_path"], 'rb') as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if orjson is not None:
+                        self._cyto_data = orjson.loads(memoryview(mm))
+                    else:
+                        # stdlib json cannot parse a buffer, so copy once
+                        self._cyto_data = json.loads(mm[:])
+                return self._cyto_data
+            except FileNotFoundError:
+                self.config['cyto_path'] = input(
+                    f"File not found: {self.config['cyto_path']}, please provide a valid path to file:")
+            except OSError:
+                self.config['cyto_path'] = input(
+                    f"Corrupted path: {self.config['cyto_path']}.  does the path you provided contain ' or \"? ")
 
     def _get_nodes_edges(self) -> tuple:
         """
         func to slice cyto json in to nodes and edges.
         :return: tuple of lists of dicts representing the cytoscape objects
         """
-        data = self._read_data_cyto()
-        nodes = data["elements"]["nodes"]
-        edges = data["elements"]["edges"]
-        return nodes, edges
+        elements = self._read_data_cyto()["elements"]
+        return elements["nodes"], elements["edges"]
+
+    def _load_locations(self, delimiter: str = ";") -> dict:
+        """
+        func to load the location -> [lon, lat] mapping from the coordinate csv.
+        small files skip pandas entirely and are parsed with the csv module;
+        larger files go through _map_locations.
+        :return: dict
+        """
+        if os.path.getsize(self.config["coord_path"]) < _SMALL_CSV_BYTES:
+            return self._read_locations_csv(delimiter)
+        self.coordinates_data = self._map_locations(delimiter)
+        return self._dataframe_to_dict(self.coordinates_data)
+
+    def _read_locations_csv(self, delimiter: str = ";") -> dict:
+        """
+        fast path for small coordinate files: build the location mapping directly
+        with csv.reader, skipping rows without usable coordinates.
+        :return: dict
+        """
+        lat, long = self.config["lat_long_cols"]
+        locations_map = {}
+        with open(self.config["coord_path"], newline="") as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            header = next(reader, None)
+            if header is None:
+                return locations_map
+            ort_idx, lat_idx, long_idx = header.index("Ort"), header.index(lat), header.index(long)
+            for row in reader:
+                try:
+                    row_lat = float(row[lat_idx])
+                    row_lon = float(row[long_idx])
+                except (IndexError, ValueError):
+                    # "undefined", empty or malformed coordinates
+                    continue
+                if isnan(row_lat) or isnan(row_lon):
+                    continue
+                locations_map[row[ort_idx]] = [row_lon, row_lat]
+        return locations_map
 
     def _map_locations(self, delimiter: str = ";") -> pd.DataFrame:
         """
@@ -59,116 +171,187 @@ class GISManager:
         :return: pd.DataFrame containing the places and their respective coordinates
         """
         lat, long = self.config["lat_long_cols"]
-        # read in data from csv
-        locations_data = pd.read_csv(self.config["coord_path"], delimiter=delimiter)
-        # drop unnecessary cols if configured to do so
-        if "cols_to_drop" in self.config.keys():
-            locations_data.drop(self.config["cols_to_drop"], axis=1, inplace=True)
+        # read in data from csv; only parse the columns we need and turn
+        # "undefined" into NaN at read time instead of filtering afterwards
+        locations_data = pd.read_csv(self.config["coord_path"], delimiter=delimiter,
+                                     usecols=["Ort", lat, long],
+                                     dtype={"Ort": str, lat: "float64", long: "float64"},
+                                     na_values=["undefined"])
         # drop NAN containing rows
         locations_data.dropna(axis=0, inplace=True)
-        # filter "undefined"
-        locations_data = locations_data[(locations_data[lat] != "undefined") & (locations_data[long] != "undefined")]
         return locations_data
 
     def create_features_edges(self, **kwargs) -> FeatureCollection:
         """
         method produces LineString geojson objects, puts them into a geojson FeatureCollection
-        and returns the FeatureCollection.
+        and returns the FeatureCollection. the collection is memoized per kwargs, so
+        repeated calls do not rebuild the edges.
         :param: processed: bool will be passed as kwarg downwards for _get_connections
         :return: FeatureCollection of network edges
         """
-        # create collection
-        collection = FeatureCollection()
-        for line_string in self._make_line_strings(**kwargs):
-            collection.add_feature(line_string)
+        key = tuple(sorted(kwargs.items()))
+        collection = self._edges_collections.get(key)
+        if collection is None:
+            # create collection
+            collection = FeatureCollection()
+            collection.extend_features(self._make_line_strings(**kwargs))
+            self._edges_collections[key] = collection
         return collection
 
     def create_features_nodes(self) -> FeatureCollection:
         """
         method produces Point objects for geojson. Returns a Feature collection in geojson object.
+        the collection is memoized, so repeated calls do not rebuild the nodes.
         :return: FeatureCollection of network nodes
         """
-        collection = FeatureCollection()
+        if self._nodes_collection is None:
+            collection = FeatureCollection()
+            collection.extend_features(self._make_points())
+            self._nodes_collection = collection
+        return self._nodes_collection
+
+    def stream_edges_geojson(self, path: str, **kwargs) -> None:
+        """
+        method writes the edge features straight to disk as a geojson FeatureCollection,
+        without holding the whole collection in memory.
+        :param path: str
+        :param: processed: bool will be passed as kwarg downwards for _get_connections
+        :return: None
+        """
+        self._stream_geojson(path, self._make_line_strings(**kwargs))
 
-        for node in self.list_of_nodes:
+    def stream_nodes_geojson(self, path: str) -> None:
+        """
+        method writes the node features straight to disk as a geojson FeatureCollection,
+        without holding the whole collection in memory.
+        :param path: str
+        :return: None
+        """
+        self._stream_geojson(path, self._make_points())
 
-            # validate city has data
-            if node["data"].get("lat") and node["data"].get("lat") != "undefined":
-                # get coordinates
-                lat = node["data"]["lat"]
-                lng = node["data"]["lng"]
-                # float them
-                coordinates = [float(lng.lstrip("0")), float(lat.lstrip("0"))]
+    @staticmethod
+    def _stream_geojson(path: str, features: Iterator) -> None:
+        """
+        func to stream features to a geojson file one at a time, writing the
+        FeatureCollection envelope around them.
+        :param path: str
+        :param features: iterable of feature dicts
+        :return: None
+        """
+        if orjson is not None:
+            def dump_feature(feature):
+                return orjson.dumps(feature).decode()
+        else:
+            dump_feature = json.dumps
 
-                # create feature
-                feature = Feature("Point", coordinates,
-                                  properties={"name": node["data"]["id"], "typ": node["data"]["Typ"],
-                                              "connections": None}
-                                  )
-                # append current feature to feature list
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as of:
+            of.write('{"type": "FeatureCollection", "features": [')
+            for count, feature in enumerate(features):
+                if count:
+                    of.write(", ")
+                of.write(dump_feature(feature))
+            of.write("]}")
 
-                collection.add_feature(feature.populated_obj)
+    def _make_points(self) -> Iterator:
+        """
+        func to make Point objects for geojson.
+        :return: generator of Point objects.
+        """
+        nodes_df = pd.DataFrame([node["data"] for node in self.list_of_nodes])
+        if "lat" not in nodes_df.columns or "lng" not in nodes_df.columns:
+            return
+        # coerce coordinates to float; "undefined" and missing values become NaN
+        nodes_df["lat"] = pd.to_numeric(nodes_df["lat"], errors="coerce")
+        nodes_df["lng"] = pd.to_numeric(nodes_df["lng"], errors="coerce")
+        # only keep nodes that have coordinates
+        nodes_df = nodes_df.dropna(subset=["lat", "lng"])
 
-        return collection
+        names = nodes_df["id"].tolist()
+        typs = nodes_df["Typ"].tolist()
+        lats = nodes_df["lat"].tolist()
+        lngs = nodes_df["lng"].tolist()
+        # hoist the global lookup out of the loop
+        make_feature = Feature
+        for name, typ, lat, lng in zip(names, typs, lats, lngs):
+            feature = make_feature("Point", [lng, lat],
+                                   properties={"name": name, "typ": typ, "connections": None})
+            yield feature.populated_obj
 
-    def _make_line_strings(self, **kwargs) -> list:
+    def _make_line_strings(self, **kwargs) -> Iterator:
         """
         func to make LineString objects for geojson.
-        :return: list of Linestring objects.
+        :return: generator of LineString objects.
         """
-        unique_locations = self.unique_locations
-        locations_map = self._dataframe_to_dict(self.coordinates_data)
-        list_of_edges = []
-        edges = self.list_of_edges
-        edges = self._get_connections(edges, **kwargs)
+        edges = self._get_connections(self.list_of_edges, **kwargs)
+        # flatten the grouped connections into parallel arrays for the kernel
+        sources, target_names, weights = [], [], []
         for source, targets in edges.items():
+            for target_name, weight in targets:
+                sources.append(source)
+                target_names.append(target_name)
+                weights.append(weight)
+        if not sources:
+            return
+
+        get_loc_id = self._loc_ids.get
+        n_edges = len(sources)
+        src_idx = np.fromiter((get_loc_id(source, -1) for source in sources),
+                              dtype=np.int64, count=n_edges)
+        tgt_idx = np.fromiter((get_loc_id(target, -1) for target in target_names),
+                              dtype=np.int64, count=n_edges)
+        src_coords, tgt_coords, valid = _gather_edge_coords(src_idx, tgt_idx, self._coords_arr)
 
-            # check if source has coordinates
-            if source in unique_locations:
-
-                source_coordinates = locations_map[source]
-                for target in targets:
-                    target_items = list(target.items())
-                    target_name, weight = target_items[0]
-                    # check if target has coordinates
-                    if target_name in unique_locations:
-                        target_coordinates = locations_map[target_name]
-                        coordinates = [source_coordinates, target_coordinates]
-                        edge = Feature("LineString", coordinates,
-                                       properties={"source": source, "target": target_name, "weight": weight})
-                        list_of_edges.append(edge.populated_obj)
-        return list_of_edges
+        make_edge = self._edge_feature
+        for i in np.flatnonzero(valid).tolist():
+            coordinates = [src_coords[i].tolist(), tgt_coords[i].tolist()]
+            yield make_edge(sources[i], target_names[i], weights[i], coordinates)
+
+    @staticmethod
+    def _edge_feature(source, target, weight, coordinates: list) -> dict:
+        """
+        func to build a LineString feature dict directly. the structure matches what
+        Feature("LineString", ...).populated_obj produces, without the intermediate
+        template copy and validation on the hot path.
+        :return: dict
+        """
+        return {
+            "type": "Feature",
+            "geometry": {
+                "type": "LineString",
+                "coordinates": coordinates
+            },
+            "properties": {"source": source, "target": target, "weight": weight}
+        }
 
     @staticmethod
     def _get_connections(edges: list, processed=True) -> dict:
         """
-        func to get a dict with all locations and their respective outward communications(target: amount of letters)
+        func to get a dict with all locations and their respective outward communications(target, amount of letters)
         :param edges: list
         :param: processed: bool indicating whether cjs is a file that was processed by Cytoscape
-        :return: dict with source of letter as key and targets as values
+        :return: dict with source of letter as key and list of (target, weight) tuples as values
         """
-        all_edges = {}  # a dictionary to store connections
-
-        # loop through edges
-        for edge in edges:
-            data = edge["data"]
-            if processed:
-                source = data.get("source_original")
-                target = data.get("target_original")
-            else:
-                source = data["source"]
-                target = data["target"]
-            weight = data["weight"]
+        all_edges = defaultdict(list)  # a dictionary to store connections
+        if not edges:
+            return all_edges
 
+        # materialize the edge payloads once; column access beats per-edge dict lookups
+        edges_df = pd.DataFrame([edge["data"] for edge in edges])
+        if processed:
+            src_col, tgt_col = "source_original", "target_original"
+        else:
+            src_col, tgt_col = "source", "target"
+        # reindex keeps dict.get() semantics: missing columns become NaN instead of raising
+        edges_df = edges_df.reindex(columns=[src_col, tgt_col, "weight"])
 
-            # Create a dictionary for the current target and weight
-            target_city = {target: weight}
-
-            # Create or update the edge dictionary for the source city
-            if source in all_edges:
-                all_edges[source].append(target_city)
-            else:
-                all_edges[source] = [target_city]
+        # loop through edges, appending each (target, weight) pair to its source city;
+        # tolist() also converts the weights back to plain Python scalars
+        sources = edges_df[src_col].tolist()
+        targets = edges_df[tgt_col].tolist()
+        weights = edges_df["weight"].tolist()
+        for source, target, weight in zip(sources, targets, weights):
+            all_edges[source].append((target, weight))
 
         return all_edges
 
@@ -179,23 +362,7 @@ class GISManager:
         :param df: pd.DataFrame
         :return: dict
         """
-        places_dict = {}
-
-        for index, row in df.iterrows():
-            place = row["Ort"]
-            lat = row["Lat"]
-            lon = row["Len"]
-
-            places_dict[place] = [float(lon), float(lat)]
-
-        return places_dict
-
-    @staticmethod
-    def _get_location_set(location_df: pd.DataFrame) -> set:
-        """
-        func to get a set of locations that have coordinates
-        :param location_df:
-        :return: set of unique locations that contain coordinates
-        """
-        locations_set = set(location_df["Ort"].unique())
-        return locations_set
+        orts = df["Ort"].to_numpy()
+        lats = df["Lat"].to_numpy(dtype=float)
+        lons = df["Len"].to_numpy(dtype=float)
+        return {ort: [lon, lat] for ort, lon, lat in zip(orts, lons.tolist(), lats.tolist())}
@@ -23,6 +23,10 @@ class TestFeatureCollectionAddingFeatures(unittest.TestCase):
         self.feature_collection.add_feature(self.feature)
         self.assertEqual(len(self.feature_collection._get_features()["features"]), 1)
 
+    def test_extend_features_method(self):
+        self.feature_collection.extend_features([self.feature, self.feature])
+        self.assertEqual(len(self.feature_collection._get_features()["features"]), 2)
+
 
 class TestFeatureCollectionSavingGeoJSON(unittest.TestCase):
     def setUp(self):